@@ -8,12 +8,11 @@ import pandas as pd
 from plotly import graph_objects as go
 import plotly.express as px
 import calendar
-from dateutil import parser
-from datetime import datetime
 import sqlite3
 import os
 from pathlib import Path
 import numpy as np
+import finance_aggregates as agg
 
 # Load data functions
 def get_db_data(db_file):
@@ -25,36 +24,6 @@ def get_budget_data(budget_csv):
     budgetdf = pd.read_csv(budget_csv)
     return budgetdf
 
-def merge_budget_expenses(budgetdf, expenses):
-    # merge qb items with budget items
-    item_totals = expenses.groupby('item').aggregate({"Amount":"sum","Date":'count'}).reset_index()
-    item_totals.columns = ['item','Amount','Transactions']
-    all_totals = pd.merge(budgetdf,item_totals, left_on='QB_Item', right_on="item", how = 'left')
-    subcategory_totals = all_totals.groupby("Subcategory").aggregate({"Budget":"sum","Amount":"sum"}).reset_index()
-    subcategory_totals.reset_index(drop = True, inplace=True)
-    return subcategory_totals
-
-def calc_ytd_totals(qbdf, year):
-    # Your existing calculation logic for YTD
-    expenses = qbdf.loc[qbdf['Account_Type'] == "Expenses"]
-    income = qbdf.loc[qbdf['Account_Type'] == "Income"]
-    start_time = parser.parse(f'{year}-01-01')
-    end_time = parser.parse(f'{year+1}-01-01')
-
-    period_expenses = expenses.loc[(expenses['Date'] >= start_time)]
-    period_income = income.loc[(income['Date'] >= start_time)]
-
-    expense_per_day = period_expenses['Amount'].sum() / (expenses['Date'].max() - start_time).days
-    income_per_day = period_income['Amount'].sum() / (income['Date'].max() - start_time).days
-
-    remaining_expenses = expense_per_day * (end_time - expenses['Date'].max()).days
-    remaining_income = income_per_day * (end_time - income['Date'].max()).days
-
-    projected_expense_total = remaining_expenses + expenses['Amount'].sum()
-    projected_income_total = remaining_income + income['Amount'].sum()
-
-    return expenses, income, projected_expense_total, projected_income_total
-
 # Data and layout initialization
 SRC_DIR = Path(__file__).parent
 dbname = "quickbooks.db"
@@ -65,7 +34,7 @@ qbdf['Date'] = pd.to_datetime(qbdf['Date'])
 budget_csv = os.path.join(SRC_DIR, 'config', 'qb_to_budget_map.csv')
 budgetdf = get_budget_data(budget_csv)
 
-ytd_expenses, ytd_income, ytd_projected_expenses, ytd_projected_income = calc_ytd_totals(qbdf, 2024)
+ytd_expenses, ytd_income, ytd_projected_expenses, ytd_projected_income = agg.calc_ytd_totals(qbdf, 2024)
 
 
 dbc_css = "https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css"
@@ -102,9 +71,8 @@ month_total_income = dbc.Card([dbc.CardHeader(html.H4("Total Income")),dbc.CardB
 month_net_profit = dbc.Card([dbc.CardHeader(html.H4("Net Profit")),dbc.CardBody(id='net-profit', className='text-center')])
 
 sub_category_plot = dcc.Graph(id='subcategory-bar-plot')
-tb_cols = ['Item', 'Transactions','Budget', 'Amount']
 transaction_table = dag.AgGrid(id='transactions-table',
-                                columnDefs = [{'field':i} for i in tb_cols],
+                                columnDefs = [{'field':i} for i in agg.REPORT_COLS],
                                 defaultColDef={"flex": 1, "minWidth": 120, "sortable": True, "resizable": True, "filter": True},
                                 dashGridOptions={"rowSelection":"multiple"})
 ytd_line_chart = dcc.Graph(id='ytd-line-chart')
@@ -145,27 +113,22 @@ app.layout = dbc.Container([
      Input('month-dropdown', 'value')]
 )
 def update_dashboard(year, month):
-    # Filter the month data
-    month_name = calendar.month_name[month]
-    start_date = datetime(year, month, 1)
-    end_date = datetime(year, month + 1, 1) if month < 12 else datetime(year + 1, 1, 1)
-    
     # Filter the data for the selected month
-    month_df = qbdf[(qbdf['Date'] >= start_date) & (qbdf['Date'] < end_date)]
-    expenses = month_df[month_df['Account_Type'] == 'Expenses']
-    income = month_df[month_df['Account_Type'] == 'Income']
+    month_df = agg.get_month_data(qbdf, year, month)
+    expenses, income = agg.split_accounts(month_df)
 
     # Calculate totals
-    total_expenses = round(expenses['Amount'].sum(), 2)
-    total_income = round(income['Amount'].sum(), 2)
-    net_profit = round(total_income - total_expenses, 2)
+    totals = agg.account_totals(expenses, income)
+    total_expenses = totals['total_expenses']
+    total_income = totals['total_income']
+    net_profit = totals['net_profit']
     profit_color = 'red' if net_profit < 0 else 'green'
     total_expenses = html.H5(f"${total_expenses}")
     total_income = html.H5(f"${total_income}")
     net_profit = html.H5(f"${net_profit}", style={'color':profit_color})
 
     # Create bar plot for subcategories
-    subcategory_totals = merge_budget_expenses(budgetdf,expenses)
+    subcategory_totals = agg.merge_budget_expenses(budgetdf,expenses)
     subcategory_totals["RG"] = np.where((subcategory_totals.Amount > subcategory_totals.Budget), 'red', 'green')
 
     bar_fig = go.Figure(data=[go.Bar(x=subcategory_totals['Subcategory'],
@@ -177,12 +140,7 @@ def update_dashboard(year, month):
     bar_fig.update_layout(xaxis_tickangle=-45, showlegend=False,margin={'t':5,'l':5,'b':5,'r':5})
 
     # Transaction table
-    item_totals = expenses.groupby('item').aggregate({"Amount":"sum","Date":'count'}).reset_index()
-    item_totals.columns = ['item','Amount','Transactions']
-    item_totals["Transactions"] = item_totals["Transactions"].apply(int)
-    all_totals = pd.merge(budgetdf,item_totals, left_on='QB_Item', right_on="item", how = 'left')
-    transaction_table = all_totals[~all_totals['item'].isin(['Lead Pastor','Associate Pastor'])][tb_cols].sort_values(['Amount'],ascending=False).to_dict('records')
-
+    transaction_table = agg.item_report(budgetdf, expenses).to_dict('records')
 
     # YTD line chart
     ytd_fig = px.line(x=ytd_expenses['Date'], y=ytd_expenses['Amount'].cumsum(), title="YTD Expenses vs Income")
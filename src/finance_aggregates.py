@@ -0,0 +1,92 @@
+import pandas as pd
+from datetime import datetime
+
+
+EXCLUDED_ITEMS = ['Lead Pastor', 'Associate Pastor']
+REPORT_COLS = ['Item', 'Transactions', 'Budget', 'Amount']
+TRANSACTION_COLS = {"Date": "Date", "Account_Type": "Type", "category": "Category",
+                    "item": "Item", "Memo/Description": "Memo", "Amount": "Amount"}
+
+
+def get_month_data(qbdf, year, month):
+    start_date = datetime(year, month, 1)
+    end_date = datetime(year, month + 1, 1) if month < 12 else datetime(year + 1, 1, 1)
+    return qbdf.loc[(qbdf['Date'] >= start_date) & (qbdf['Date'] < end_date)]
+
+def get_year_data(qbdf, year):
+    return qbdf.loc[(qbdf['Date'] >= datetime(year, 1, 1)) & (qbdf['Date'] < datetime(year + 1, 1, 1))]
+
+def split_accounts(df):
+    expenses = df.loc[df['Account_Type'] == "Expenses"]
+    income = df.loc[df['Account_Type'] == "Income"]
+    return expenses, income
+
+def account_totals(expenses, income):
+    total_expenses = round(expenses['Amount'].sum(), 2)
+    total_income = round(income['Amount'].sum(), 2)
+    return {"total_expenses": total_expenses,
+            "total_income": total_income,
+            "net_profit": round(total_income - total_expenses, 2)}
+
+def item_budget_totals(budgetdf, expenses):
+    # merge qb items with budget items
+    item_totals = expenses.groupby('item').aggregate({"Amount": "sum", "Date": 'count'}).reset_index()
+    item_totals.columns = ['item', 'Amount', 'Transactions']
+    item_totals["Transactions"] = item_totals["Transactions"].apply(int)
+    return pd.merge(budgetdf, item_totals, left_on='QB_Item', right_on="item", how='left')
+
+def merge_budget_expenses(budgetdf, expenses):
+    all_totals = item_budget_totals(budgetdf, expenses)
+    subcategory_totals = all_totals.groupby("Subcategory").aggregate({"Budget": "sum", "Amount": "sum"}).reset_index()
+    subcategory_totals.reset_index(drop=True, inplace=True)
+    return subcategory_totals
+
+def item_report(budgetdf, expenses, budget_months=1):
+    # budget_months scales the monthly budget, e.g. 12 for the YTD table
+    period_budget = budgetdf.copy()
+    period_budget['Budget'] = period_budget['Budget'] * budget_months
+    all_totals = item_budget_totals(period_budget, expenses)
+    # filter on the budget-side key; 'item' is NaN for months with no activity
+    report_totals = all_totals[~all_totals['QB_Item'].isin(EXCLUDED_ITEMS)]
+    return report_totals[REPORT_COLS].sort_values(['Amount'], ascending=False)
+
+def transaction_table(df):
+    return df[list(TRANSACTION_COLS)].rename(columns=TRANSACTION_COLS)
+
+def project_total(df, period_df, start_time, end_time):
+    # project out based on average daily amount in period_df
+    total = df['Amount'].sum()
+    if len(df) == 0:
+        return total
+    max_date = df['Date'].max()
+    days = (max_date - start_time).days
+    if days <= 0:
+        return total
+    per_day = period_df['Amount'].sum() / days
+    return per_day * (end_time - max_date).days + total
+
+def calc_ytd_totals(qbdf, year):
+    # Intentionally shared by both dashboards and the API: only rows in `year`
+    # are counted, and the daily average leaves out expenses of 4000 or more
+    # and the Worship Contribution / Olive Tree lease income.
+
+    # separate income and expenses and time bin for the year
+    expenses, income = split_accounts(get_year_data(qbdf, year))
+    start_time = datetime(year, 1, 1)
+    end_time = datetime(year + 1, 1, 1)
+
+    # remove large expenses and special accounts from the avg calculation
+    period_expenses = expenses.loc[expenses['Amount'] < 4000]
+    period_income = income.loc[(income['item'] != "Worship Contribution") & (income['item'] != 'Olive Tree (Tenant Lease)')]
+
+    projected_expense_total = project_total(expenses, period_expenses, start_time, end_time)
+    projected_income_total = project_total(income, period_income, start_time, end_time)
+
+    return (expenses, income, projected_expense_total, projected_income_total)
+
+def ytd_series(expenses, income):
+    # cumulative daily totals, carried forward over days with no activity
+    series = pd.concat([expenses.groupby('Date')['Amount'].sum().rename('Expenses'),
+                        income.groupby('Date')['Amount'].sum().rename('Income')], axis=1, sort=True)
+    series.index.name = 'Date'
+    return series.sort_index().fillna(0).cumsum().round(2).reset_index()
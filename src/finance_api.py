@@ -0,0 +1,284 @@
+import os
+import io
+import gzip
+import json
+import hashlib
+import sqlite3
+import threading
+import calendar
+import functools
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+import pandas as pd
+from flask import Flask, Response, abort, request
+
+import finance_aggregates as agg
+
+try:
+    import pyarrow as pa
+except ImportError:  # arrow output is optional
+    pa = None
+
+
+SRC_DIR = Path(__file__).parent
+DB_PATH = os.path.join(SRC_DIR, "db", "quickbooks.db")
+BUDGET_CSV = os.path.join(SRC_DIR, "config", "qb_to_budget_map.csv")
+
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+FORMATS = ("json", "arrow")
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MIN_GZIP_BYTES = 512
+# year + 1 must stay a valid datetime year for the period bounds
+MAX_YEAR = 9998
+# bump when aggregation or response shape changes so old ETags stop matching
+API_VERSION = "2"
+
+Snapshot = namedtuple("Snapshot", ["version", "qbdf", "budgetdf"])
+
+
+def has_table(conn, name):
+    query = "select 1 from sqlite_master where type='table' and name=?"
+    return conn.execute(query, (name,)).fetchone() is not None
+
+
+class FinanceStore:
+    """
+    Read-only view of the ETL output. Data is reloaded only when the sqlite
+    file or budget map changes on disk; each load is published as one
+    Snapshot so a version never pairs with another load's dataframes.
+    """
+    def __init__(self, db_file=DB_PATH, budget_csv=BUDGET_CSV):
+        self.db_file = db_file
+        self.budget_csv = budget_csv
+        self._snapshot = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _file_signature(self):
+        db_stat = os.stat(self.db_file)
+        budget_stat = os.stat(self.budget_csv)
+        return (db_stat.st_mtime_ns, db_stat.st_size,
+                budget_stat.st_mtime_ns, budget_stat.st_size)
+
+    def refresh(self):
+        signature = self._file_signature()
+        with self._lock:
+            if signature != self._signature:
+                self._snapshot = self._load(signature)
+                self._signature = signature
+            return self._snapshot
+
+    def _load(self, signature):
+        conn = sqlite3.connect(self.db_file)
+        try:
+            # read rows and version from the same sqlite snapshot
+            conn.execute("begin")
+            row = None
+            if has_table(conn, "etl_metadata"):
+                row = conn.execute("select data_version from etl_metadata").fetchone()
+            qbdf = pd.read_sql("select * from categorized_items", conn)
+        finally:
+            conn.close()
+        if row is not None:
+            etl_version = row[0]
+        else:
+            # databases written before the ETL recorded a version
+            etl_version = f"{signature[0]:x}-{signature[1]:x}"
+        qbdf['Date'] = pd.to_datetime(qbdf['Date'])
+        budgetdf = pd.read_csv(self.budget_csv)
+        budget_version = f"{signature[2]:x}-{signature[3]:x}"
+        return Snapshot(f"{etl_version}.{budget_version}", qbdf, budgetdf)
+
+
+# serialization
+def to_json_bytes(meta, rows):
+    payload = dict(meta)
+    if rows is not None:
+        payload["rows"] = json.loads(rows.to_json(orient='records', date_format='iso', date_unit='s'))
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+def to_arrow_bytes(meta, rows):
+    if rows is None:
+        table = pa.Table.from_pylist([meta])
+    else:
+        table = pa.Table.from_pandas(rows, preserve_index=False)
+        table = table.replace_schema_metadata({"meta": json.dumps(meta)})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+class BodyCache:
+    """
+    Small LRU of encoded response bodies keyed by ETag, so a full GET of an
+    unchanged resource skips both the aggregation and the gzip pass.
+    """
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+store = FinanceStore()
+body_cache = BodyCache()
+app = Flask(__name__)
+
+
+# request validation, run before the conditional check
+def check_period(year, month=None):
+    if not 1900 <= year <= MAX_YEAR:
+        abort(400, "year out of range")
+    if month is not None and not 1 <= month <= 12:
+        abort(400, "month must be between 1 and 12")
+    return {"year": year, "month": month}
+
+def int_arg(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, f"{name} must be an integer")
+
+def check_page(year, month=None):
+    params = check_period(year, month)
+    page = int_arg("page", 1)
+    page_size = int_arg("page_size", DEFAULT_PAGE_SIZE)
+    if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+        abort(400, f"page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+    params.update({"page": page, "page_size": page_size})
+    return params
+
+def check_format():
+    fmt = request.args.get("format", "json")
+    if fmt not in FORMATS:
+        abort(400, "format must be json or arrow")
+    if fmt == "arrow" and pa is None:
+        abort(406, "arrow output requires pyarrow")
+    return fmt
+
+def make_etag(version, endpoint, params, fmt):
+    key = json.dumps([API_VERSION, version, endpoint, sorted(params.items()), fmt])
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+def data_version_header(snapshot):
+    return f"{snapshot.version}+api{API_VERSION}"
+
+def accepts_gzip():
+    return request.accept_encodings["gzip"] > 0
+
+def aggregate_endpoint(validate=check_period):
+    """
+    Wraps a view returning (meta, rows) with ETag validation, body caching,
+    gzip and json/arrow output. `validate` turns the route kwargs into the
+    normalised params the view receives and the ETag is keyed on. A matching
+    If-None-Match on a valid request is answered with a 304 before any data
+    is touched.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(**kwargs):
+            params = validate(**kwargs)
+            fmt = check_format()
+
+            snapshot = store.refresh()
+            etag = make_etag(snapshot.version, request.endpoint, params, fmt)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                cached = body_cache.get(etag)
+                if cached is None:
+                    meta, rows = func(snapshot, **params)
+                    body = to_arrow_bytes(meta, rows) if fmt == "arrow" else to_json_bytes(meta, rows)
+                    gz_body = gzip.compress(body, compresslevel=6) if len(body) >= MIN_GZIP_BYTES else None
+                    cached = (body, gz_body)
+                    body_cache.put(etag, cached)
+                body, gz_body = cached
+                mimetype = ARROW_MIMETYPE if fmt == "arrow" else "application/json"
+                if gz_body is not None and accepts_gzip():
+                    response = Response(gz_body, mimetype=mimetype)
+                    response.headers["Content-Encoding"] = "gzip"
+                else:
+                    response = Response(body, mimetype=mimetype)
+
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "no-cache"
+            response.headers["Vary"] = "Accept-Encoding"
+            response.headers["X-Data-Version"] = data_version_header(snapshot)
+            return response
+        return wrapper
+    return decorator
+
+
+@app.route("/api/version")
+def get_version():
+    return {"data_version": data_version_header(store.refresh()), "api_version": API_VERSION}
+
+@app.route("/api/months/<int:year>/<int:month>/summary")
+@aggregate_endpoint()
+def get_month_summary(snapshot, year, month):
+    expenses, income = agg.split_accounts(agg.get_month_data(snapshot.qbdf, year, month))
+    meta = {"year": year, "month": month, "month_name": calendar.month_name[month],
+            "transactions": int(len(expenses) + len(income))}
+    meta.update(agg.account_totals(expenses, income))
+    return meta, None
+
+@app.route("/api/months/<int:year>/<int:month>/subcategories")
+@aggregate_endpoint()
+def get_subcategories(snapshot, year, month):
+    expenses, _ = agg.split_accounts(agg.get_month_data(snapshot.qbdf, year, month))
+    subcategory_totals = agg.merge_budget_expenses(snapshot.budgetdf, expenses)
+    subcategory_totals["Over_Budget"] = subcategory_totals["Amount"] > subcategory_totals["Budget"]
+    return {"year": year, "month": month}, subcategory_totals
+
+@app.route("/api/months/<int:year>/<int:month>/items")
+@aggregate_endpoint()
+def get_items(snapshot, year, month):
+    expenses, _ = agg.split_accounts(agg.get_month_data(snapshot.qbdf, year, month))
+    return {"year": year, "month": month}, agg.item_report(snapshot.budgetdf, expenses)
+
+@app.route("/api/ytd/<int:year>")
+@aggregate_endpoint()
+def get_ytd(snapshot, year, month=None):
+    expenses, income, projected_expenses, projected_income = agg.calc_ytd_totals(snapshot.qbdf, year)
+    meta = {"year": year,
+            "projected_expenses": round(projected_expenses, 2),
+            "projected_income": round(projected_income, 2)}
+    meta.update(agg.account_totals(expenses, income))
+    return meta, agg.ytd_series(expenses, income)
+
+@app.route("/api/transactions/<int:year>")
+@app.route("/api/transactions/<int:year>/<int:month>")
+@aggregate_endpoint(validate=check_page)
+def get_transactions(snapshot, year, month, page, page_size):
+    if month is not None:
+        df = agg.get_month_data(snapshot.qbdf, year, month)
+    else:
+        df = agg.get_year_data(snapshot.qbdf, year)
+    df = df.sort_values('Date', kind='stable')
+    rows = agg.transaction_table(df.iloc[(page - 1) * page_size:page * page_size])
+    meta = {"year": year, "month": month, "page": page, "page_size": page_size,
+            "total_rows": int(len(df)), "pages": -(-len(df) // page_size)}
+    return meta, rows
+
+
+if __name__ == '__main__':
+    app.run(port=8051)
@@ -12,6 +12,7 @@ from bokeh.models import ColumnDataSource, Label
 from jinja2 import Environment, FileSystemLoader
 import math
 import numpy as np
+import finance_aggregates as agg
 
 
 SRC_DIR = Path(__file__).parent
@@ -30,32 +31,10 @@ def get_budget_data(budget_csv):
     
     return budgetdf
 
-@pn.cache
-def calc_ytd_totals(qbdf, year):
-
-    # separate income and expenses and time bin for the year
-    expenses = qbdf.loc[qbdf['Account_Type']=="Expenses"]
-    income = qbdf.loc[qbdf['Account_Type']=="Income"]
-    start_time = parser.parse(f'{year}-01-01')
-    end_time = parser.parse(f'{year+1}-01-01')
-    expense_max_date = expenses['Date'].max()
-    income_max_date = income['Date'].max()
-
-    # remove large expenses and special accounts from the avg calculation
-    period_expenses = expenses.loc[(expenses['Date']>=start_time) & (expenses['Amount']<4000)]
-    period_income = income.loc[(income['Date']>=start_time) & (income['item']!="Worship Contribution") & (income['item']!='Olive Tree (Tenant Lease)')]
-
-    # project out based on average daily income/expense
-    expense_days = (expense_max_date - start_time).days
-    income_days = (income_max_date - start_time).days
-    expense_per_day = period_expenses['Amount'].sum() / expense_days
-    income_per_day = period_income['Amount'].sum() / income_days
-    remaining_expenses = expense_per_day * (end_time - expense_max_date).days
-    remaining_income = income_per_day * (end_time - income_max_date).days
-    projected_expense_total = remaining_expenses + expenses['Amount'].sum()
-    projected_income_total = remaining_income + income['Amount'].sum()
-
-    return (expenses, income, projected_expense_total, projected_income_total)
+# shared aggregates, memoized for the interactive session
+calc_ytd_totals = pn.cache(agg.calc_ytd_totals)
+merge_budget_expenses = pn.cache(agg.merge_budget_expenses)
+get_month_data = pn.cache(agg.get_month_data)
 
 def check_fields(qbdf,budgetdf):
     # preprocessing/data manipulation
@@ -76,30 +55,6 @@ def check_fields(qbdf,budgetdf):
             print(f"Warning: {item} not in any budget category.. consider\
                   generating specific report.")
 
-@pn.cache            
-def merge_budget_expenses(budgetdf, expenses):
-    # merge qb items with budget items
-    item_totals = expenses.groupby('item').aggregate({"Amount":"sum","Date":'count'}).reset_index()
-    item_totals.columns = ['item','Amount','Transactions']
-    all_totals = pd.merge(budgetdf,item_totals, left_on='QB_Item', right_on="item", how = 'left')
-    subcategory_totals = all_totals.groupby("Subcategory").aggregate({"Budget":"sum","Amount":"sum"}).reset_index()
-    subcategory_totals.reset_index(drop = True, inplace=True)
-    return subcategory_totals
-
-@pn.cache
-def get_month_data(year, month, qbdf):
-    month_name = calendar.month_name[month]
-    days = calendar.monthrange(year,month)[1]
-    print(f"Generating plot for {year}-{month_name}")
-    interval = (f"{year}-{month}-01",f"{year}-{month}-{days}")
-    interval_dates = (parser.parse(interval[0]),parser.parse(interval[1]))
-    
-    # trim all dataframes
-    month_df = qbdf.loc[(qbdf['Date']>=interval_dates[0]) &
-                  (qbdf['Date']<=interval_dates[1])]
-    
-    return month_df
-
 
 class FinanceDashboard(param.Parameterized):
     """
@@ -145,9 +100,9 @@ class FinanceDashboard(param.Parameterized):
 
     @pn.depends("year", "month", watch=True)
     def generate_month_report(self):
-        self.month_df = get_month_data(self.year, self.month, self.qb_df)
-        self.expenses = self.month_df.loc[self.month_df['Account_Type']=="Expenses"]
-        self.income = self.month_df.loc[self.month_df['Account_Type']=="Income"]
+        print(f"Generating plot for {self.year}-{calendar.month_name[self.month]}")
+        self.month_df = get_month_data(self.qb_df, self.year, self.month)
+        self.expenses, self.income = agg.split_accounts(self.month_df)
         self.subcategory_totals = merge_budget_expenses(self.budget_df, self.expenses)
     
     @pn.depends('subcategory_totals')
@@ -170,11 +125,7 @@ class FinanceDashboard(param.Parameterized):
     def gen_table(self):
         if self.expenses is None or len(self.expenses)==0:
             return pn.pane.HTML(f"<h1> No Data </h1>")
-        item_totals = self.expenses.groupby('item').aggregate({"Amount":"sum","Date":'count'}).reset_index()
-        item_totals.columns = ['item','Amount','Transactions']
-        item_totals["Transactions"] = item_totals["Transactions"].apply(int)
-        all_totals = pd.merge(self.budget_df,item_totals, left_on='QB_Item', right_on="item", how = 'left')
-        report_totals = all_totals[~all_totals['item'].isin(['Lead Pastor','Associate Pastor'])][['Item', 'Transactions','Budget', 'Amount']].sort_values(['Amount'],ascending=False)
+        report_totals = agg.item_report(self.budget_df, self.expenses)
 
         expense_table = pn.widgets.Tabulator(report_totals, height=500, page_size=10,
                                              pagination='remote',
@@ -188,8 +139,7 @@ class FinanceDashboard(param.Parameterized):
         if self.expenses is None or len(self.expenses)==0:
             return pn.pane.HTML("<h1> No Data </h1>")
         else:
-            mdf = self.month_df[["Date","Account_Type","category","item","Memo/Description","Amount"]]
-            mdf.columns = ["Date","Type","Category","Item","Memo","Amount"]
+            mdf = agg.transaction_table(self.month_df)
 
             return pn.widgets.Tabulator(mdf, height=700, show_index=False,
                                         theme='bootstrap', layout='fit_columns',
@@ -255,13 +205,7 @@ class FinanceDashboard(param.Parameterized):
     def gen_ytd_table(self):
         if self.expenses is None or len(self.expenses)==0:
             return pn.pane.HTML(f"<h1> No Data </h1>")
-        item_totals = self.ytd_expenses.groupby('item').aggregate({"Amount":"sum","Date":'count'}).reset_index()
-        item_totals.columns = ['item','Amount','Transactions']
-        item_totals["Transactions"] = item_totals["Transactions"].apply(int)
-        year_budget = self.budget_df.copy()
-        year_budget['Budget']=year_budget['Budget']*12
-        all_totals = pd.merge(year_budget,item_totals, left_on='QB_Item', right_on="item", how = 'left')
-        report_totals = all_totals[~all_totals['item'].isin(['Lead Pastor','Associate Pastor'])][['Item', 'Transactions','Budget', 'Amount']].sort_values(['Amount'],ascending=False)
+        report_totals = agg.item_report(self.budget_df, self.ytd_expenses, budget_months=12)
 
         expense_table = pn.widgets.Tabulator(report_totals, height=500, page_size=10,
                                              pagination='remote',
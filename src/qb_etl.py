@@ -7,6 +7,8 @@ import yaml
 import sqlite3
 from pathlib import Path
 import logging
+import hashlib
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(format='%(asctime)s %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
@@ -57,6 +59,25 @@ def pre_proc_df(qbdf):
     qbdf['Account_Type'] = qbdf['category'].apply(lambda x: x.split(':')[0])
     return qbdf
 
+def data_version(qbdf):
+    # content hash of the loaded items, used by the API as its ETag seed
+    row_hashes = pd.util.hash_pandas_object(qbdf, index=False).values
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()[:16]
+
+def save_to_db(qbdf, conn):
+    # pandas commits each to_sql call, so stage both tables first and swap
+    # them in together; readers never see new rows under an old data_version
+    meta = pd.DataFrame([{"data_version": data_version(qbdf),
+                          "loaded_at": datetime.now().isoformat(timespec='seconds'),
+                          "row_count": len(qbdf)}])
+    qbdf.to_sql('categorized_items_staging', conn, if_exists='replace', index=False)
+    meta.to_sql('etl_metadata_staging', conn, if_exists='replace', index=False)
+    with conn:
+        conn.execute("begin")
+        for table in ['categorized_items', 'etl_metadata']:
+            conn.execute(f"drop table if exists {table}")
+            conn.execute(f"alter table {table}_staging rename to {table}")
+
 
 
 def load_yaml(yaml_file:str):
@@ -69,9 +90,8 @@ def load_yaml(yaml_file:str):
             sys.exit(1)
 
 
-credentials = load_yaml(os.path.join(SRC_DIR,"config","credential.yaml"))
-
 if __name__=="__main__":
+    credentials = load_yaml(os.path.join(SRC_DIR,"config","credential.yaml"))
     year = 2024
     print("Generating auth client")
     client = get_auth_client(credentials['client_id'],credentials['client_secret'],
@@ -96,7 +116,7 @@ if __name__=="__main__":
     dbpath = os.path.join(SRC_DIR,"db",dbname)
     conn = sqlite3.connect(dbpath) 
     print(f"Saving results to sqlite DB: {dbpath}")
-    qbdf.to_sql('categorized_items', conn, if_exists='replace', index=False)
+    save_to_db(qbdf, conn)
 
 
 
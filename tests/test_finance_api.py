@@ -0,0 +1,156 @@
+import gzip
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+SRC_DIR = Path(__file__).parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import finance_aggregates as agg
+import finance_api
+from qb_etl import save_to_db
+
+ITEMS_CSV = SRC_DIR / "notebook" / "categorized_items.csv"
+BUDGET_CSV = SRC_DIR / "config" / "qb_to_budget_map.csv"
+SUMMARY_URL = "/api/months/2024/2/summary"
+ITEMS_URL = "/api/months/2024/2/items"
+
+
+def load_items():
+    return pd.read_csv(ITEMS_CSV, index_col=0)
+
+def write_db(db_file, qbdf):
+    conn = sqlite3.connect(db_file)
+    try:
+        save_to_db(qbdf, conn)
+    finally:
+        conn.close()
+
+@pytest.fixture
+def db_file(tmp_path):
+    db_file = tmp_path / "quickbooks.db"
+    write_db(db_file, load_items())
+    return db_file
+
+@pytest.fixture
+def client(db_file, monkeypatch):
+    monkeypatch.setattr(finance_api, "store", finance_api.FinanceStore(db_file, BUDGET_CSV))
+    monkeypatch.setattr(finance_api, "body_cache", finance_api.BodyCache())
+    return finance_api.app.test_client()
+
+
+def test_summary_matches_shared_aggregates(client):
+    qbdf = load_items()
+    qbdf['Date'] = pd.to_datetime(qbdf['Date'])
+    expenses, income = agg.split_accounts(agg.get_month_data(qbdf, 2024, 2))
+
+    response = client.get(SUMMARY_URL)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    for key, value in agg.account_totals(expenses, income).items():
+        assert body[key] == pytest.approx(value)
+
+def test_ytd_projection(client):
+    # year-filtered totals, with large expenses and special income left out
+    # of the daily average
+    qbdf = load_items()
+    qbdf['Date'] = pd.to_datetime(qbdf['Date'])
+    qbdf = qbdf.loc[qbdf['Date'].dt.year == 2024]
+    start, end = pd.Timestamp(2024, 1, 1), pd.Timestamp(2025, 1, 1)
+    expenses = qbdf.loc[qbdf['Account_Type'] == "Expenses"]
+    income = qbdf.loc[qbdf['Account_Type'] == "Income"]
+    avg_expenses = expenses.loc[expenses['Amount'] < 4000]
+    avg_income = income.loc[~income['item'].isin(["Worship Contribution", "Olive Tree (Tenant Lease)"])]
+
+    def projected(df, avg_df):
+        last = df['Date'].max()
+        return df['Amount'].sum() + avg_df['Amount'].sum() / (last - start).days * (end - last).days
+
+    body = client.get("/api/ytd/2024").get_json()
+
+    assert body["projected_expenses"] == pytest.approx(projected(expenses, avg_expenses), abs=0.01)
+    assert body["projected_income"] == pytest.approx(projected(income, avg_income), abs=0.01)
+
+@pytest.mark.parametrize("url", ["/api/months/2024/2/items", "/api/months/2023/5/items"])
+def test_items_exclude_salaries(client, url):
+    rows = client.get(url).get_json()["rows"]
+    assert rows
+    budget = pd.read_csv(BUDGET_CSV)
+    excluded = set(budget.loc[budget['QB_Item'].isin(agg.EXCLUDED_ITEMS), 'Item'])
+    assert not excluded & {row["Item"] for row in rows}
+
+def test_etag_tracks_api_version(client, monkeypatch):
+    etag = client.get(SUMMARY_URL).headers["ETag"]
+    monkeypatch.setattr(finance_api, "API_VERSION", "test")
+
+    response = client.get(SUMMARY_URL, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.headers["X-Data-Version"].endswith("+apitest")
+
+def test_max_year_is_served(client):
+    assert client.get("/api/months/9998/12/summary").status_code == 200
+
+def test_matching_etag_returns_304(client):
+    first = client.get(SUMMARY_URL)
+    etag = first.headers["ETag"]
+
+    second = client.get(SUMMARY_URL, headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.data == b""
+
+def test_equivalent_queries_share_etag(client):
+    etags = {client.get(url).headers["ETag"] for url in
+             ["/api/transactions/2024/2", "/api/transactions/2024/2?page=1",
+              "/api/transactions/2024/2?format=json&page_size=100"]}
+    assert len(etags) == 1
+
+def test_etag_changes_after_etl_rewrite(client, db_file):
+    etag = client.get(SUMMARY_URL).headers["ETag"]
+    qbdf = load_items()
+    qbdf.loc[qbdf.index[0], 'Amount'] += 1
+    write_db(db_file, qbdf)
+
+    response = client.get(SUMMARY_URL, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_gzip_negotiation(client):
+    zipped = client.get(ITEMS_URL, headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(zipped.data))["rows"]
+
+    for accept in ["gzip;q=0", "identity, *;q=0", "identity"]:
+        plain = client.get(ITEMS_URL, headers={"Accept-Encoding": accept})
+        assert "Content-Encoding" not in plain.headers
+        assert plain.get_json()["rows"]
+
+def test_arrow_format(client):
+    pa = pytest.importorskip("pyarrow")
+    response = client.get(ITEMS_URL + "?format=arrow")
+    table = pa.ipc.open_stream(response.data).read_all()
+    assert table.column_names == agg.REPORT_COLS
+
+@pytest.mark.parametrize("url", [
+    "/api/months/2024/13/summary",
+    "/api/months/2024/0/items",
+    "/api/transactions/2024?page=abc",
+    "/api/transactions/2024?page=0",
+    "/api/transactions/2024?page_size=5000",
+    "/api/ytd/2024?format=xml",
+    "/api/ytd/9999",
+    "/api/transactions/9999",
+    "/api/months/9999/12/summary",
+])
+def test_invalid_requests_return_400(client, url):
+    assert client.get(url).status_code == 400
+    assert client.get(url, headers={"If-None-Match": "*"}).status_code == 400